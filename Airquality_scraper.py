@@ -1,27 +1,63 @@
 import os
-import json
+import orjson
 import time
 import uuid
+import itertools
+import threading
 import boto3
+import requests
+import lxml.html
+import requests_cache
 import numpy
 import psycopg2
-import inquirer
 import pandas as pd
-import urllib.request
 from selenium import webdriver
 from collections import defaultdict
+from requests.adapters import HTTPAdapter
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.service import Service
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from selenium.common.exceptions import TimeoutException, InvalidSessionIdException, NoSuchWindowException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+_service = None
+# Errors meaning the browser session itself is gone, rather than the page missing an element
+_DEAD_SESSION_ERRORS = (InvalidSessionIdException, NoSuchWindowException, Urllib3HTTPError, ConnectionError)
+_REQUEST_TIMEOUT = (10, 60) # Seconds to connect and between bytes received before a request is abandoned
+_SITE_DATA_URL = 'https://uk-air.defra.gov.uk/data_files/site_data/{site_id}_{year}.csv' # Pre-formatted data file for a site and year
+
+# Selenium locators used on the AURN website
+_COOKIE_MESSAGE = (By.ID, 'global-cookie-message')
+_COOKIE_SUBMIT = (By.CSS_SELECTOR, "button[name='submit']")
+_TAB_SCROLL_ARROW = (By.CSS_SELECTOR, 'div.scrtabs-tab-scroll-arrow-left')
+_NETWORKS_TAB_LINK = (By.CSS_SELECTOR, '#li_tab_networks a')
+_TAB_NETWORKS = (By.ID, 'tab_networks')
+_FORMATTED_DATA_LINK = (By.LINK_TEXT, 'Pre-Formatted Data Files')
+_YEAR_LINKS_SCRIPT = ("return Array.from(document.querySelector('div.table-responsive > *').querySelectorAll('a'))"
+                        ".filter(a => a.textContent.trim() === arguments[0]).map(a => a.href);")
+
+def _get_service():
+    """ 
+    This is a private function which starts the chromedriver service once so every 
+    Chrome driver, from any scraper instance, connects to the same running service.
+    """
+    global _service
+    if _service is None:
+        _service = Service()
+        _service.start()
+    return _service
+
 class AURNScraper:
     """ 
     This class will navigate the website to collect air quality monitoring site information 
     from an individual site or all sites. For a single site the information will be stored as 
     a dictionary and site images can be downloaded. For all sites the information will be saved 
-    as a .pkl file. From this database sites can be selected by distance from user specified 
+    as a .parquet file. From this database sites can be selected by distance from user specified 
     coordinates to retrieve the air quality monitoring data for a specified year. Below is a 
     step by step example.
 
@@ -32,9 +68,9 @@ class AURNScraper:
         AURN.single_site_info(site_name='Port Talbot Margam', download_imgs=True)
 
     Example 2 - Retrieve site information for multiple sites and download files:
-        Step 1 - Update or create the 'All_Sites_Outputs.pkl' to obtain information for all sites in the AURN network. 
+        Step 1 - Update or create the 'All_Sites_Outputs.parquet' to obtain information for all sites in the AURN network. 
             AURN = AURNScraper()
-            AURN.all_sites_info()
+            AURN.all_sites_info(overwrite=True)
         Step 2 - Find sites within specified distance from specified coordinates:
             sites_for_download = AURN.find_sites_by_distance(X=394366, Y=807397, 
                                 distance_m=50000) 
@@ -45,29 +81,149 @@ class AURNScraper:
     ----------
     url : str
         URL address to the AURN website 
+
+    workers : int
+        Number of sites scraped concurrently and maximum number of headless Chrome 
+        drivers started for the scraper. The default value is 4.
     """
-    def __init__(self, url: str ='https://uk-air.defra.gov.uk/interactive-map'):
+    _idle_drivers = [] # Chrome drivers are shared by all scraper instances and started on first use
+    _driver_count = 0
+    _driver_condition = threading.Condition() # Guards the pool and wakes borrowers when a driver or slot frees up
+    _driver_uses = {}
+    _rotate_after = 25 # Pages visited before a driver is replaced to bound Chrome's memory growth
+
+    def __init__(self, url: str ='https://uk-air.defra.gov.uk/interactive-map', workers: int = 4):
         self.url = url
+        self.workers = workers
         current_dir = os.getcwd()
         self.new_dir = os.path.join(current_dir, r'monitoring_files')
         if not os.path.exists(self.new_dir):
             os.makedirs(self.new_dir)
         chromeOptions = webdriver.ChromeOptions()
-        prefs = {"download.default_directory" : self.new_dir}
+        prefs = {"download.default_directory" : self.new_dir,
+                "profile.managed_default_content_settings.images": 2, # Only page text and links are read so skip images
+                "profile.default_content_setting_values.notifications": 2}
         chromeOptions.add_experimental_option("prefs",prefs)
         chromeOptions.add_argument('--headless')
         chromeOptions.add_argument('--disable-gpu')
-        self.driver = webdriver.Chrome(options=chromeOptions)
-        self.driver.get(url)
+        chromeOptions.add_argument('--blink-settings=imagesEnabled=false')
+        chromeOptions.add_argument('--disable-extensions')
+        chromeOptions.add_argument('--no-sandbox')
+        chromeOptions.add_argument('--disable-dev-shm-usage')
+        chromeOptions.add_argument('--disable-background-networking')
+        self._chrome_options = chromeOptions
+        self._session = requests.Session() # Keep-alive connections reused for every file download
+        self._session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+        # Site info pages are cached on disk for a day and revalidated with their ETag/Last-Modified once stale
+        self._page_session = requests_cache.CachedSession('aurn_cache', backend='sqlite', expire_after=86400)
+        self._page_session.mount('https://', HTTPAdapter(pool_maxsize=32))
+        self._pg = None # RDS connection, opened on first use
+        self._api_cache = None # (API file path, modified time, dataframe)
+
+    def _start_driver(self):
+        """ 
+        This is a private method which starts a headless Chrome driver on the AURN 
+        website and accepts cookies.
+        """
+        with AURNScraper._driver_condition:
+            service = _get_service()
+        driver = webdriver.Remote(command_executor=service.service_url, options=self._chrome_options)
+        try:
+            driver.get(self.url)
+            self._accept_cookies(driver)
+        except:
+            driver.quit() # The pool slot is released by the caller, so don't leave the browser running
+            raise
+        return driver
+
+    def _borrow_driver(self):
+        """ 
+        This is a private method which takes an idle driver from the shared pool, starting 
+        a new one if fewer than 'workers' drivers are running.
+        """
+        with AURNScraper._driver_condition:
+            while not AURNScraper._idle_drivers and AURNScraper._driver_count >= self.workers:
+                AURNScraper._driver_condition.wait()
+            if AURNScraper._idle_drivers:
+                return AURNScraper._idle_drivers.pop()
+            AURNScraper._driver_count += 1
+        try:
+            return self._start_driver()
+        except:
+            self._release_driver_slot()
+            raise
+
+    def _release_driver_slot(self):
+        """ 
+        This is a private method which frees a pool slot when a driver fails to start or is 
+        thrown away, waking a waiting borrower so it can start a driver in its place.
+        """
+        with AURNScraper._driver_condition:
+            AURNScraper._driver_count -= 1
+            AURNScraper._driver_condition.notify()
+
+    def _return_driver(self, driver):
+        """ 
+        This is a private method which puts a driver back in the shared pool, replacing 
+        it with a fresh driver once it has been used '_rotate_after' times.
+        """
+        uses = self._driver_uses.pop(driver, 0) + 1
+        if uses >= self._rotate_after:
+            try:
+                driver = self._rotate_driver(driver)
+            except Exception as E:
+                print("Error restarting driver", E)
+                self._release_driver_slot()
+                return
+            uses = 0
+        with AURNScraper._driver_condition:
+            self._driver_uses[driver] = uses
+            AURNScraper._idle_drivers.append(driver)
+            AURNScraper._driver_condition.notify()
+
+    def _discard_driver(self, driver):
+        """ 
+        This is a private method which quits a driver that raised an error instead of 
+        returning it to the shared pool, and frees its slot for a fresh driver.
+        """
+        with AURNScraper._driver_condition:
+            self._driver_uses.pop(driver, None)
+        try:
+            driver.quit()
+        except Exception as E: # The session may already have crashed
+            print("Error quitting driver", E)
+        self._release_driver_slot()
+
+    def _rotate_driver(self, driver):
+        """ 
+        This is a private method which quits a driver and starts a new one in its place.
+        """
+        driver.quit()
+        return self._start_driver()
+
+    @classmethod
+    def close(cls):
+        """ 
+        Quits all the idle Chrome drivers and stops the chromedriver service. Call this once 
+        all scraping has finished.
+        """
+        global _service
+        with cls._driver_condition:
+            while cls._idle_drivers:
+                cls._idle_drivers.pop().quit()
+                cls._driver_count -= 1
+            cls._driver_uses.clear()
+            if _service is not None:
+                _service.stop()
+                _service = None
 
 # accept cookies
-    def _accept_cookies(self):
+    def _accept_cookies(self, driver):
         """ 
         This is a private method which accepts cookies when the webpage is initiated.
         """
-        WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.ID, 'global-cookie-message')))
-        cookie_window = self.driver.find_element_by_xpath("//div[@id='global-cookie-message']")
-        cookie_window.find_element_by_xpath(".//button[@name='submit']").click()
+        cookie_window = WebDriverWait(driver, 5).until(EC.presence_of_element_located(_COOKIE_MESSAGE))
+        cookie_window.find_element(*_COOKIE_SUBMIT).click()
 
 # find specified site
     def single_site_info(self, site_name: str, download_imgs:bool = False) -> dict:
@@ -90,47 +246,49 @@ class AURNScraper:
             {'Site': f'{site_name}', 'Site Info: ': {'Env_Type': '[env type]', 'X_and_Y': '[coordinates]', 
             'Location': '[location]', 'Web Link': f'{site_info_link}'}}
         """
-        site_info_dict = {'Name': [], 'Environment Type': [], 'Coordinates':[], 'Address':[], 'Web Link': [], 'Image Names':[]}
-        self._accept_cookies()
+        site_info_dict = {'Name': [], 'Environment Type': [], 'X': [], 'Y': [], 'Address':[], 'Web Link': [], 'Image Names':[]}
         api_df = self._dataframe_API()
         my_site = api_df.loc[api_df['site_name'] == site_name, 'site info link'].iloc[0]
-        site_info = self._retrieve_site_info(site_name, my_site, download_imgs)
+        site_name, site_info = self._scrape_one(site_name, my_site, download_imgs)
         site_info_dict['Name'].append(site_name)
         site_info_dict['Environment Type'].append(site_info[0])
-        site_info_dict['Coordinates'].append(site_info[1])
-        site_info_dict['Address'].append(site_info[2])
-        site_info_dict['Web Link'].append(site_info[3])
+        site_info_dict['X'].append(site_info[1])
+        site_info_dict['Y'].append(site_info[2])
+        site_info_dict['Address'].append(site_info[3])
+        site_info_dict['Web Link'].append(site_info[4])
         site_info_dict['Image Names'].append(self._check_for_image_download(site_name))
         print(site_info_dict)
         return site_info_dict
     
+    def _scrape_one(self, site_name, this_site, retrieve_img=False):
+        """ 
+        This is a private method which collates the site information for a single site. 
+        Returns a tuple of the site name and its information.
+        """
+        return site_name, self._retrieve_site_info(site_name, this_site, retrieve_img)
+
     def _retrieve_site_info(self, site_name, this_site, retrieve_img=False):
         """ 
         This is a private method which collates the site information for each site.
         """
-
-        self.driver.get(this_site)
+        r = self._page_session.get(this_site, timeout=_REQUEST_TIMEOUT)
+        r.raise_for_status()
+        tree = lxml.html.fromstring(r.content, base_url=this_site)
         #retrieve data in dictionary: Site Name, Location, Environment Type, eastings, northings, pollutants measured?
-        WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.ID, 'tab_info')))
-        tab_info = self.driver.find_element_by_xpath("//div[@id='tab_info']")
-        my_tags = tab_info.find_elements_by_tag_name('p')
-        for info in my_tags:
-            if 'Environment Type' in info.text:
-                env_type = info.text.split(': ')[1]
-            elif 'Easting/Northing' in info.text:
-                try:
-                    X_co = int(info.text.split(': ')[1].split(', ')[0])
-                    Y_co = int(info.text.split(': ')[1].split(', ')[1])
-                    site_xy = [X_co, Y_co]
-                except:
-                    site_xy = info.text.split(': ')[1]
-            elif 'Site Address' in info.text:
-                site_address = info.text.split(': ')[1]
+        # Each paragraph reads 'Label: value', split them all into a dictionary in one pass
+        tab_info = dict(' '.join(info.text_content().split()).partition(': ')[::2] 
+                        for info in tree.xpath("//div[@id='tab_info']//p"))
+        env_type = tab_info['Environment Type']
+        try:
+            X_co, Y_co = (float(co) for co in tab_info['Easting/Northing'].split(', '))
+        except ValueError: # Easting/Northing not given as a pair of numbers
+            X_co, Y_co = numpy.nan, numpy.nan
+        site_address = tab_info['Site Address']
         if retrieve_img == True:
-            self._retrieve_images(site_name)
-        return [env_type, site_xy, site_address, this_site]
+            self._retrieve_images(site_name, tree)
+        return [env_type, X_co, Y_co, site_address, this_site]
     
-    def _retrieve_images(self, site_name, folder_name='image_files'):
+    def _retrieve_images(self, site_name, tree, folder_name='image_files'):
         """
         This is a private method which downloads images for a single site if the
         user specifies to do this.
@@ -139,28 +297,58 @@ class AURNScraper:
         new_dir = os.path.join(current_dir, r'{f}'.format(f = folder_name))
         if not os.path.exists(new_dir):
             os.makedirs(new_dir)
-        site_photos = self.driver.find_element_by_xpath("//div[@class='carousel-inner']")
-        all_photos = site_photos.find_elements_by_xpath("./div[@class='item']/*")
-        filenumber = 0
-        for link in all_photos:
-            filename = f"{site_name}{filenumber}"
+        tree.make_links_absolute()
+        all_photos = tree.xpath("//div[@class='carousel-inner']/div[@class='item']/*/@src")
+        tasks = []
+        for imagenumber, src in enumerate(all_photos):
+            filename = f"{site_name}{imagenumber}"
             if os.path.exists(f'{new_dir}/{filename}.jpg')==True: # Do not download if image already exists
                 print(f"{filename} already exists. Image not replaced.")
             else:
-                src = link.get_attribute('src')
-                urllib.request.urlretrieve(src,f"{new_dir}/{filename}.jpg")
-                filenumber += 1
+                tasks.append((src, f"{new_dir}/{filename}.jpg"))
+        with ThreadPoolExecutor(max_workers=8) as executor: # Workers share the session's connection pool
+            list(executor.map(lambda task: self._download_file(*task), tasks))
+        filenumber = len(tasks)
         print ("Number of images downloaded: ", filenumber)
         return "Number of images downloaded: ", filenumber
 
-    def all_sites_info(self) -> dict:
+    def _download_file(self, src, path):
+        """
+        This is a private method which streams a file from a URL to the specified path
+        over the scraper's pooled session. The file is written to a temporary file first 
+        so an interrupted download never leaves a partial file at the path.
+        """
+        with self._session.get(src, stream=True, timeout=_REQUEST_TIMEOUT) as r:
+            r.raise_for_status()
+            # A unique name stops concurrent downloads of one file clashing, and plain open() 
+            # keeps the usual umask permissions on the finished file
+            temp_path = f'{path}.{uuid.uuid4().hex}.part'
+            try:
+                with open(temp_path, 'xb') as f:
+                    # iter_content wraps errors raised mid-stream as requests exceptions
+                    for chunk in r.iter_content(chunk_size=64 * 1024):
+                        f.write(chunk)
+                os.replace(temp_path, path)
+            except:
+                os.remove(temp_path)
+                raise
+
+    def all_sites_info(self, overwrite: bool = False, skip_sites_in_RDS: bool = False) -> dict:
         """ 
         Returns site information (Environment type, X and Y Coordinates, Location and URL link) 
         for all sites on the AURN website.
 
         Parameters
         ----------
-        N/A
+        overwrite : bool
+            Choose if you want to overwrite an existing output file. If set to False and the 
+            output file already exists, its contents are returned without scraping. The default 
+            value is False.
+
+        skip_sites_in_RDS : bool
+            Choose if you want to skip sites whose information is already stored on RDS. The 
+            result of a run that skips sites is only returned and is not saved to the output 
+            file, so the output file always holds all sites. The default value is False.
 
         Returns
         -------
@@ -168,55 +356,36 @@ class AURNScraper:
             {'Site': f'{site_name}', 'Site Info: ': {'Env_Type': '[env type]', 'X_and_Y': '[coordinates]', 
             'Location': '[location]', 'Web Link': f'{site_info_link}'}}
             
-            All_Sites_Output.pkl: Output file of all sites
+            All_Sites_Outputs.parquet: Output file of all sites
         """
-        try: # If All_Sites_Ouput.pkl already exists ask user if they want to overwrite it
-            if os.path.isfile('All_Sites_Outputs.pkl') == True:
-                question = {inquirer.Confirm('confirmed',
-                    message="It looks like an output file with all the sites in has already been created. Do you want to overwrite this?",
-                    default=True),}
-                ans = inquirer.prompt(question)
-            if ans['confirmed']==False:
-                print("Ok. Method has ended.")
-                return
-        except: # Above question won't work unless file being called is a .py file
-            pass
-        self._accept_cookies()
-        site_info_dict = {'UUID': [],'Name': [], 'Environment Type': [], 'Coordinates':[], 'Address':[], 'Web Link': [], 'Image Names':[]}
+        if overwrite == False and skip_sites_in_RDS == False and (os.path.isfile('All_Sites_Outputs.parquet') or os.path.isfile('All_Sites_Outputs.pkl')):
+            print("An output file with all the sites in has already been created. Set overwrite=True to replace it.")
+            return self._load_all_sites()
+        rows = []
         api_df = self._dataframe_API()
         #print(api_df.head())
-        for i in range(len(api_df)):
-            try:
-                name_of = api_df['site_name'].iloc[i]
-                # print("string", name_of)
-                site_info_dict['UUID'].append(uuid.uuid4())
-                site_info_dict['Name'].append(name_of)
-                api_site_link = api_df['site info link'].iloc[i]
-                # print(api_site_link)
-                site_info = self._retrieve_site_info(name_of, api_site_link)
-                site_info_dict['Environment Type'].append(site_info[0])
-                site_info_dict['Coordinates'].append(site_info[1])
-                site_info_dict['Address'].append(site_info[2])
-                site_info_dict['Web Link'].append(site_info[3])
-                site_info_dict['Image Names'].append(self._check_for_image_download(name_of))
-                # print(site_info_dict)
-            except IndexError:
-                print("Index Error", i)
-                print (site_info_dict)
-                pass
-            except Exception as E:
-                print("Error",E , i)
-                pass
-            except:
-                print("Error", i)
-                pass
-            finally:
-                #self.pad_dict_list(site_info_dict)
-                site_info_df = pd.DataFrame.from_dict(site_info_dict,orient='index')
-                site_info_df = site_info_df.transpose()
-        self.driver.quit()    
-        #site_info_df = pd.DataFrame.from_dict(site_info_dict)
-        site_info_df.to_pickle("All_Sites_Outputs.pkl")
+        if skip_sites_in_RDS == True:
+            sites_in_RDS = self._check_sites_in_RDS(list(api_df['site_name']))
+            api_df = api_df[~api_df['site_name'].isin(sites_in_RDS)]
+        downloaded_images = self._list_downloaded_images()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._scrape_one, name_of, api_site_link): name_of 
+                        for name_of, api_site_link in zip(api_df['site_name'], api_df['site info link'])}
+            # Results are collected on this thread in API order so the rows are only ever appended 
+            # to here and the output is the same on every run
+            for future, name_of in futures.items():
+                try:
+                    name_of, site_info = future.result()
+                except Exception as E:
+                    print("Error", E, name_of)
+                    continue
+                rows.append({'UUID': str(uuid.uuid4()), 'Name': name_of, 'Environment Type': site_info[0], 
+                            'X': site_info[1], 'Y': site_info[2], 'Address': site_info[3], 'Web Link': site_info[4], 
+                            'Image Names': self._check_for_image_download(name_of, downloaded_images)})
+        site_info_df = pd.DataFrame(rows, columns=['UUID', 'Name', 'Environment Type', 'X', 'Y', 'Address', 'Web Link', 'Image Names'])
+        site_info_df = site_info_df.astype({'X': 'float64', 'Y': 'float64'})
+        if skip_sites_in_RDS == False: # A run without the sites in RDS would drop them from the output file
+            site_info_df.to_parquet("All_Sites_Outputs.parquet", engine='pyarrow', compression='snappy')
         return site_info_df
         
     # find all sites within x distance
@@ -247,20 +416,15 @@ class AURNScraper:
             coordinates.
         """
         try:
-            all_sites_file = pd.read_pickle(r'All_Sites_Outputs.pkl')
-        except:
-            print("All_Sites_Ouputs.pkl not in current directory. Move this file to current directory or run 'all_sites_info' method to retrieve data")
+            all_sites_file = self._load_all_sites()
+        except FileNotFoundError:
+            print("All_Sites_Outputs.parquet not in current directory. Move this file to current directory or run 'all_sites_info' method to retrieve data")
             return
-        if 'X' not in all_sites_file and 'Y' not in all_sites_file:
-            all_sites_file.insert(2, 'X', 0)
-            all_sites_file.insert(3, 'Y', 0)
-            all_sites_file.insert(5, 'distance from point', 0)
-
-        all_sites_file['X'] = all_sites_file['Coordinates'].str[0]
-        all_sites_file['Y'] = all_sites_file['Coordinates'].str[1]
-        ans = ((((X-all_sites_file['X'])**2)+((Y-all_sites_file['Y'])**2))**0.5)
-        all_sites_file['distance from point'] = ans
-        df = all_sites_file[all_sites_file['distance from point']< distance_m]
+        xs = all_sites_file['X'].to_numpy(dtype='float64')
+        ys = all_sites_file['Y'].to_numpy(dtype='float64')
+        distance = numpy.hypot(xs - X, ys - Y)
+        all_sites_file['distance from point'] = distance
+        df = all_sites_file[distance < distance_m]
         print(f"Below are all sites within {distance_m / 1000}km of specified points")
         print(df)
         return df
@@ -290,42 +454,88 @@ class AURNScraper:
             The downloaded data will appear in the current directory as individual csv 
             files.
         """
-        self._accept_cookies()
         download_report = {'Successful Downloads Count': 0, 'Unsuccessful Download list': []}
-        for index, row in dataframe.iterrows():
-            self.driver.get(row['Web Link'])
-            WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.XPATH, "//div[@class='scrtabs-tab-scroll-arrow scrtabs-tab-scroll-arrow-left']")))
-            path = self.driver.find_element_by_xpath("//ul[@class='nav nav-tabs nav-tabs-responsive']")
-            networks = path.find_element_by_xpath("./li[@id='li_tab_networks']")
-            tag_a = networks.find_element_by_tag_name("a")
-            self.driver.execute_script("arguments[0].click();", tag_a)
-            tab_networks = path.find_element_by_xpath("//div[@id='tab_networks']")
-            formatted_data = tab_networks.find_element_by_link_text('Pre-Formatted Data Files')
-            self.driver.execute_script("arguments[0].click();", formatted_data)
-            table = self.driver.find_elements_by_xpath("//div[@class='table-responsive']/*")
-            element = table[0]
-            all_years = element.find_elements_by_tag_name('a')
-            downloads_before_loop = download_report['Successful Downloads Count']
-            for AURN_year, loop_no in zip(all_years, range(len(all_years))):
-                if AURN_year.text == str(year):
-                    linkname = AURN_year.get_attribute('href')
-                    split_list = linkname.split('/')
-                    name = split_list[len(split_list)-1].split('?')[0]
-                    if os.path.exists(f'{self.new_dir}/{name}') == True:
-                        print(f'{name} monitoring file already exists. File not replaced.')
-                    else:
-                        self.driver.execute_script("arguments[0].click();", AURN_year)
-                        download_report['Successful Downloads Count'] += 1
-                if (loop_no+1) == len(all_years):
-                    if downloads_before_loop == download_report['Successful Downloads Count']:
-                        download_report['Unsuccessful Download list'].append(row['Name'])
+        # A site listed in several networks has a different site_id in each. The 'aurn' network
+        # comes first in the API and its site_id is the one used in the data file names
+        api_df = self._dataframe_API().drop_duplicates('site info link')
+        site_ids = dict(zip(api_df['site info link'], api_df['site_id']))
+        # Sites listed under several networks share a Web Link, so each link is only downloaded once
+        site_names = {}
+        for web_link, name in zip(dataframe['Web Link'], dataframe['Name']):
+            names = site_names.setdefault(web_link, [])
+            if name not in names:
+                names.append(name)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = {executor.submit(self._download_one, web_link, site_ids.get(web_link), year): names 
+                        for web_link, names in site_names.items()}
+            for future in as_completed(futures):
+                try:
+                    downloads = future.result()
+                except Exception as E:
+                    print("Error", E, futures[future])
+                    downloads = 0
+                download_report['Successful Downloads Count'] += downloads
+                if downloads == 0:
+                    download_report['Unsuccessful Download list'].extend(futures[future])
         print(download_report)
         return download_report
     
-    # convert pkl records to json file
+    def _download_one(self, this_site, site_id, year):
+        """ 
+        This is a private method which downloads the monitoring data for a single site 
+        directly from its data file URL, falling back to navigating the site page with 
+        a driver if the URL can't be resolved. Returns the number of files downloaded.
+        """
+        if site_id is None:
+            return self._download_with_driver(this_site, year)
+        name = f'{site_id}_{year}.csv'
+        if os.path.exists(f'{self.new_dir}/{name}') == True:
+            print(f'{name} monitoring file already exists. File not replaced.')
+            return 0
+        try:
+            self._download_file(_SITE_DATA_URL.format(site_id=site_id, year=year), f'{self.new_dir}/{name}')
+            return 1
+        except requests.RequestException:
+            return self._download_with_driver(this_site, year)
+
+    def _download_with_driver(self, this_site, year):
+        """ 
+        This is a private method which borrows a driver from the pool to find the monitoring 
+        data link on the site page and download it. Returns the number of files downloaded.
+        """
+        driver = self._borrow_driver()
+        try:
+            driver.get(this_site)
+            WebDriverWait(driver, 5).until(EC.presence_of_element_located(_TAB_SCROLL_ARROW))
+            tag_a = driver.find_element(*_NETWORKS_TAB_LINK)
+            driver.execute_script("arguments[0].click();", tag_a)
+            tab_networks = driver.find_element(*_TAB_NETWORKS)
+            formatted_data = tab_networks.find_element(*_FORMATTED_DATA_LINK)
+            driver.execute_script("arguments[0].click();", formatted_data)
+            # Collect the links for the year in one script call rather than reading each link's text
+            year_links = driver.execute_script(_YEAR_LINKS_SCRIPT, str(year))
+        except _DEAD_SESSION_ERRORS:
+            self._discard_driver(driver)
+            raise
+        except:
+            self._return_driver(driver) # The page had no data files table but the session is still usable
+            raise
+        self._return_driver(driver)
+        downloads = 0
+        for linkname in year_links:
+            split_list = linkname.split('/')
+            name = split_list[len(split_list)-1].split('?')[0]
+            if os.path.exists(f'{self.new_dir}/{name}') == True:
+                print(f'{name} monitoring file already exists. File not replaced.')
+            else:
+                self._download_file(linkname, f'{self.new_dir}/{name}')
+                downloads += 1
+        return downloads
+
+    # convert output file records to json file
     def pkl_to_json(self, folder_name : str='json_files'):
         ''' 
-        This will convert individual records in the All_Sites_Outputs.pkl file into json records
+        This will convert individual records in the All_Sites_Outputs.parquet file into json records
         and save these in the "json files" directory or create this directory if it doesn't 
         already exist.
 
@@ -337,19 +547,37 @@ class AURNScraper:
         Returns
         -------
         json files : .json
-            Individual records from All_Sites_Outputs.pkl as .json.       
+            Individual records from All_Sites_Outputs.parquet as .json.       
         '''
         current_dir = os.getcwd()
         new_dir = os.path.join(current_dir, r'{f}'.format(f = folder_name))
         if not os.path.exists(new_dir):
             os.makedirs(new_dir)
         
-        output_file = pd.read_pickle(r'All_Sites_Outputs.pkl')
-        for index, row in output_file.iterrows():
-            site_name = output_file.iloc[index]['Name']
-            output_file.iloc[index].to_json(r'{nd}/{si}.json'.format(nd = new_dir, si = site_name))
+        output_file = self._load_all_sites()
+        # Sites listed in several networks share a file name, keep the last record as writing them in turn did
+        records = output_file.drop_duplicates('Name', keep='last').to_dict(orient='records')
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda record: self._write_json(record, r'{nd}/{si}.json'.format(nd = new_dir, si = record['Name'])), records))
         print(f'individual record of output file have been converted to json files in {new_dir}')
     
+    def _write_json(self, record, path):
+        '''
+        This is a private method which writes a single record to a json file.
+        '''
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(record, default=self._json_default, option=orjson.OPT_SERIALIZE_NUMPY))
+
+    @staticmethod
+    def _json_default(obj):
+        '''
+        This is a private method which serialises the object arrays parquet returns 
+        for list columns, such as 'Image Names', which orjson can't serialise itself.
+        '''
+        if isinstance(obj, numpy.ndarray):
+            return obj.tolist()
+        raise TypeError
+
     def upload_directory_to_s3(self, folder : str, bucketname : str):
         ''' 
         This method will upload the contents of your chosen folder to an AWS S3 bucket.
@@ -367,71 +595,110 @@ class AURNScraper:
         '''
         current_dir = os.getcwd()
         path = os.path.join(current_dir,folder)
-        s3_client = boto3.client('s3')
-        for root,dirs,files in os.walk(path):
-            for file in files:
-                s3_client.upload_file(os.path.join(root,file),bucketname,file)
+        upload_workers, parts_per_file = 10, 4
+        # Every upload thread needs its own connection, so size the client's pool to match
+        s3_client = boto3.client('s3', config=Config(max_pool_connections=upload_workers * parts_per_file))
+        config = TransferConfig(max_concurrency=parts_per_file, use_threads=True)
+        all_files = [(os.path.join(root,file), file) for root,dirs,files in os.walk(path) for file in files]
+        with ThreadPoolExecutor(max_workers=upload_workers) as executor:
+            futures = [executor.submit(s3_client.upload_file, file_path, bucketname, key, Config=config) 
+                        for file_path, key in all_files]
+            for future in as_completed(futures):
+                future.result()
         return
     
-    def _check_for_image_download(self, site_name : str) -> list:
+    def _load_all_sites(self) -> pd.DataFrame:
         '''
-        This is a private method which checks if images have already been downloaded
-        for a site which is then appended to the outputs table or dictionary.
+        This is a private method which loads All_Sites_Outputs.parquet. If only the 
+        older All_Sites_Outputs.pkl exists it is converted to parquet once, splitting 
+        its 'Coordinates' column into X and Y columns.
+        '''
+        if os.path.isfile('All_Sites_Outputs.parquet') or not os.path.isfile('All_Sites_Outputs.pkl'):
+            return pd.read_parquet(r'All_Sites_Outputs.parquet', engine='pyarrow')
+        all_sites_file = pd.read_pickle(r'All_Sites_Outputs.pkl')
+        if 'Coordinates' in all_sites_file:
+            if 'X' not in all_sites_file:
+                position = all_sites_file.columns.get_loc('Coordinates')
+                all_sites_file.insert(position, 'X', pd.to_numeric(all_sites_file['Coordinates'].str[0], errors='coerce'))
+                all_sites_file.insert(position + 1, 'Y', pd.to_numeric(all_sites_file['Coordinates'].str[1], errors='coerce'))
+            all_sites_file = all_sites_file.drop(columns='Coordinates').astype({'X': 'float64', 'Y': 'float64'})
+        if 'UUID' in all_sites_file:
+            all_sites_file['UUID'] = all_sites_file['UUID'].astype(str) # Parquet can't store uuid.UUID objects
+        all_sites_file.to_parquet("All_Sites_Outputs.parquet", engine='pyarrow', compression='snappy')
+        return all_sites_file
+
+    def _list_downloaded_images(self) -> list:
+        '''
+        This is a private method which lists the names of all images already 
+        downloaded to the image_files directory with a single directory read.
         '''
         current_dir = os.getcwd()
-        image_dir = os.path.join(current_dir, r'{f}'.format(f = 'image_files'))    
-        contin = True
-        val = 0
-        image_name_list = []
-        while contin == True:
-            if os.path.exists(f'{image_dir}/{site_name}{val}.jpg'):
-                image_name_list.append(f'{site_name}{val}')
-                val += 1
-            else:
-                contin = False
+        image_dir = os.path.join(current_dir, r'{f}'.format(f = 'image_files'))
+        if not os.path.isdir(image_dir):
+            return []
+        with os.scandir(image_dir) as entries:
+            return [entry.name[:-len('.jpg')] for entry in entries if entry.name.endswith('.jpg')]
+
+    def _check_for_image_download(self, site_name : str, image_names : list = None) -> list:
+        '''
+        This is a private method which checks if images have already been downloaded
+        for a site which is then appended to the outputs table or dictionary. A listing 
+        from _list_downloaded_images can be passed in to avoid rescanning the directory.
+        '''
+        if image_names is None:
+            image_names = self._list_downloaded_images()
+        image_name_list = [name for name in image_names 
+                            if name.startswith(site_name) and name[len(site_name):].isdigit()]
+        image_name_list.sort(key=lambda name: int(name[len(site_name):]))
         if len(image_name_list) == 0:
             image_name_list.append("No Downloaded Images")
         return image_name_list
 
-    def _check_site_in_RDS(self, site_name):
+    def _rds_connection(self):
         '''
-        This is a private method that checks if the information for a site is 
-        already stored on RDS '''
-        connection = psycopg2.connect(user='postgres',
+        This is a private method that opens the connection to RDS on first use 
+        and reuses it afterwards.'''
+        if self._pg is None or self._pg.closed:
+            self._pg = psycopg2.connect(user='postgres',
                                 password='mysecretpassword',
                                 host='airqualityscraper.clbqzprnzcak.eu-west-2.rds.amazonaws.com',
                                 port=5432,
                                 # server='scraper_data',
                                 database='postgres')
-        cursor = connection.cursor()
-        postgreSQL_select_Query = f"""Select "Name" FROM aq_data WHERE "Name" IN ('{site_name}');"""
-        cursor.execute(postgreSQL_select_Query)
-        my_val = cursor.fetchall()
-        if site_name in my_val[0]:
-            return True
-        else:
-            return False
+            self._pg.autocommit = True # Only reads are made, so don't hold a transaction open between them
+        return self._pg
+
+    def _check_sites_in_RDS(self, site_names : list) -> set:
+        '''
+        This is a private method that checks which of the sites have their 
+        information already stored on RDS in a single query.'''
+        with self._rds_connection().cursor() as cursor:
+            postgreSQL_select_Query = """SELECT "Name" FROM aq_data WHERE "Name" = ANY(%s);"""
+            cursor.execute(postgreSQL_select_Query, (site_names,))
+            return {row[0] for row in cursor.fetchall()}
+
+    def _check_site_in_RDS(self, site_name):
+        '''
+        This is a private method that checks if the information for a site is 
+        already stored on RDS '''
+        return site_name in self._check_sites_in_RDS([site_name])
     
     def _dataframe_API(self,API_loc="AURN_API.json"):
         '''
         This is a private method that converts the json API with the
-        link to all AURN sites into a usable dataframe.
+        link to all AURN sites into a usable dataframe. The dataframe is 
+        cached and only rebuilt when the json file is modified.
         '''
         json_file_path = API_loc
-        with open(json_file_path, 'r') as j:
-            contents = json.loads(j.read())
-        my_list = []
-        for i in contents.keys():
-            #print(f"key: {i}", len(contents[i]))
-            df = pd.DataFrame(contents[i])
-            #df.replace("", numpy.NaN, inplace=True)
-            my_list.append(df)
-        df = pd.concat(my_list, axis=0)
-        df.drop(columns=['exception','parameter_ids',
-                'network_name', 'network_id','site_status',
-                'overall_index','environment_id','country_id']
-                ,axis=0, inplace=True)
+        mtime = os.stat(json_file_path).st_mtime
+        if self._api_cache is not None and self._api_cache[:2] == (json_file_path, mtime):
+            return self._api_cache[2]
+        with open(json_file_path, 'rb') as j:
+            contents = orjson.loads(j.read())
+        # Sites from every network in the API go into a single dataframe
+        df = pd.DataFrame(itertools.chain.from_iterable(contents.values()))
         site_info_link = 'https://uk-air.defra.gov.uk/networks/site-info?uka_id='
         df['site info link'] = site_info_link + df['uka_id']
-        df = df[['site_name', 'site info link']]
+        df = df[['site_name', 'site_id', 'site info link']]
+        self._api_cache = (json_file_path, mtime, df)
         return df
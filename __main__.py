@@ -5,7 +5,7 @@ AURN = AURNScraper()
 '''Retrieve site information for a single site'''
 # AURN.single_site_info('Sheffield Barnsley Road',download_imgs=True)
 ''' Retrieve site information for multiple sites'''
-# AURN.all_sites_info()
+# AURN.all_sites_info(overwrite=True)
 '''Find sites within a distance of specified coordinates'''
 # my_sites = AURN.find_sites_by_distance(X=436276,Y=389930,distance_m=10000)
 '''Download monitoring data CSV files for specified sites and year'''
@@ -17,4 +17,6 @@ AURN = AURNScraper()
 # AURN.upload_directory_to_s3('json_files')
 
 # help(AURN)
-# AURN._dataframe_API()
\ No newline at end of file
+# AURN._dataframe_API()
+'''Quit the Chrome drivers once finished'''
+# AURN.close()
@@ -12,5 +12,5 @@ setup(
     author='Martin Sheard',
     license='MIT',
     packages=find_packages(), # Only one main module but does contain tests
-    install_requires=['selenium', 'time', 'collections', 'urllib','pandas', 'os', 'inquirer'], # All external libraries
+    install_requires=['selenium', 'time', 'collections', 'requests', 'requests-cache', 'lxml', 'orjson', 'pandas', 'pyarrow', 'os'], # All external libraries
 )
\ No newline at end of file